@@ -9,23 +9,56 @@ Author: Subir Sutradhar (Senior Operations Engineer)
 import os
 import sys
 import time
+import hashlib
+import io
+import heapq
+import json
+import math
+import multiprocessing
+import queue
 import shutil
-import tempfile
+import threading
+import types
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 from colorama import Fore, Style, init
 
 # Third-party libraries (install via pip if missing)
-# pip install -U openai-whisper gTTS pydub colorama pyfiglet
+# pip install -U faster-whisper gTTS av numpy colorama pyfiglet
 try:
-    import whisper
+    import av
+    import numpy as np
+    import ctranslate2
+    from faster_whisper import WhisperModel, BatchedInferencePipeline
+    from faster_whisper.audio import decode_audio
+    import gtts.tts
+    import requests
+    import urllib3
     from gtts import gTTS
-    from pydub import AudioSegment
     from pyfiglet import Figlet
 except Exception as e:
     print("Missing dependency: " + str(e))
-    print("Install required packages: pip install -U openai-whisper gTTS pydub colorama pyfiglet")
+    print("Install required packages: pip install -U faster-whisper gTTS av numpy colorama pyfiglet")
     sys.exit(1)
 
+# Optional local TTS backend (Piper voice on ONNX Runtime); gTTS is used without it
+# pip install -U onnxruntime piper-phonemize scipy
+try:
+    import onnxruntime as ort
+    from piper_phonemize import phonemize_espeak
+    from scipy.signal import resample_poly
+except ImportError as e:
+    ort = None
+    _LOCAL_TTS_IMPORT_ERROR = e
+
+# Optional JIT for the mixing kernel; a NumPy fallback is used without it
+# pip install -U numba
+try:
+    import numba
+except ImportError:
+    numba = None
+
 init(autoreset=True)
 
 # ----------------------------
@@ -86,35 +119,473 @@ def banner():
 # ----------------------------
 # Utility checks
 # ----------------------------
-def check_ffmpeg():
-    if shutil.which("ffmpeg") is None:
-        print(Fore.RED + "FFmpeg not found on PATH. pydub requires ffmpeg.")
-        print("Install FFmpeg and ensure it's available in your PATH.")
-        sys.exit(1)
-
 def safe_remove(path):
     try:
-        if os.path.exists(path):
-            os.remove(path)
-    except Exception:
+        os.unlink(path)
+    except OSError:
+        # Includes FileNotFoundError, so no separate existence check is needed
         pass
 
 # ----------------------------
 # Time formatting helper for SRT
 # ----------------------------
-def ms_to_srt_timestamp(ms: int) -> str:
-    hours = ms // 3600000
-    minutes = (ms % 3600000) // 60000
-    seconds = (ms % 60000) // 1000
-    milliseconds = ms % 1000
-    return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
+def ms_to_srt_timestamps(ms_array) -> list:
+    """Format an array of millisecond offsets as SRT timestamps (HH:MM:SS,mmm)."""
+    hours, rest = np.divmod(np.asarray(ms_array, dtype=np.int64), 3_600_000)
+    minutes, rest = np.divmod(rest, 60_000)
+    seconds, ms = np.divmod(rest, 1000)
+    return [
+        f"{h:02d}:{m:02d}:{s:02d},{x:03d}"
+        for h, m, s, x in zip(hours.tolist(), minutes.tolist(), seconds.tolist(), ms.tolist())
+    ]
+
+# ----------------------------
+# Audio decoding
+# ----------------------------
+def load_audio(src, sample_rate=None, channels=None):
+    """Decode an audio file (path or file object) in-process with PyAV.
+
+    Resamples to sample_rate / channels when given; otherwise keeps the stream's
+    rate and up to two channels. Returns (samples, sample_rate) where samples is
+    int16 shaped (n, channels).
+    """
+    with av.open(src) as container:
+        stream = container.streams.audio[0]
+        channels = channels or min(2, len(stream.layout.channels))
+        sample_rate = sample_rate or stream.rate
+        resampler = av.AudioResampler(
+            format="s16", layout="stereo" if channels == 2 else "mono", rate=sample_rate,
+        )
+        chunks = []
+        for frame in container.decode(stream):
+            chunks.extend(f.to_ndarray() for f in resampler.resample(frame))
+        chunks.extend(f.to_ndarray() for f in resampler.resample(None))
+    if not chunks:
+        return np.zeros((0, channels), dtype=np.int16), sample_rate
+    # Packed s16 frames are (1, samples * channels); interleave back into columns
+    return np.concatenate(chunks, axis=1).reshape(-1, channels), sample_rate
+
+# ----------------------------
+# Audio mixing
+# ----------------------------
+if numba is not None:
+    @numba.njit(parallel=True, nogil=True, cache=True)
+    def mix_saturating(dst, src, offset):
+        """Add int16 src into int16 dst at offset, saturating in a single pass."""
+        for i in numba.prange(src.shape[0]):
+            for c in range(src.shape[1]):
+                v = np.int32(dst[offset + i, c]) + np.int32(src[i, c])
+                if v > 32767:
+                    v = 32767
+                elif v < -32768:
+                    v = -32768
+                dst[offset + i, c] = v
+else:
+    def mix_saturating(dst, src, offset):
+        """Add int16 src into int16 dst at offset, saturating at the int16 range."""
+        view = dst[offset:offset + len(src)]
+        view[...] = np.clip(view.astype(np.int32) + src, -32768, 32767)
+
+# ----------------------------
+# Whisper model (loaded once per process)
+# ----------------------------
+WHISPER_BATCH_SIZE = 16
+# "int8" (default) quantizes the weights; "half" runs float16 on CUDA and
+# bfloat16 on CPUs that support it
+WHISPER_PRECISION = os.environ.get("GTEN_WHISPER_PRECISION", "int8").strip().lower()
+if WHISPER_PRECISION not in ("int8", "half"):
+    print(Fore.RED + f"Invalid GTEN_WHISPER_PRECISION={WHISPER_PRECISION!r}; use 'int8' or 'half'.")
+    sys.exit(1)
+_WHISPER_PIPELINE = None
+
+def whisper_device():
+    return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+
+def whisper_compute_type(device):
+    """Pick the CTranslate2 compute type for WHISPER_PRECISION on this device."""
+    if WHISPER_PRECISION == "half":
+        preferred = "float16" if device == "cuda" else "bfloat16"
+    else:  # "int8"
+        # INT8 weights halve the memory traffic of the decoder
+        preferred = "int8_float16" if device == "cuda" else "int8"
+    if preferred in ctranslate2.get_supported_compute_types(device):
+        return preferred
+    return "default"
+
+def get_whisper(name="medium"):
+    """Return the shared batched Whisper pipeline, loading it on first use."""
+    global _WHISPER_PIPELINE
+    if _WHISPER_PIPELINE is None:
+        device = whisper_device()
+        compute_type = whisper_compute_type(device)
+        print(Fore.YELLOW + f"🔄 Loading Whisper model ({name}, {device}, {compute_type}). This may take a while...")
+        model = WhisperModel(
+            name, device=device, compute_type=compute_type,
+            cpu_threads=os.cpu_count() or 0,
+        )
+        _WHISPER_PIPELINE = BatchedInferencePipeline(model=model)
+    return _WHISPER_PIPELINE
+
+# ----------------------------
+# Multi-process Whisper (CPU only)
+# ----------------------------
+# Number of worker processes for CPU transcription; each gets cpu_count / P threads
+try:
+    WHISPER_WORKERS = int(os.environ.get("GTEN_WHISPER_WORKERS", "1"))
+except ValueError:
+    WHISPER_WORKERS = 0
+if WHISPER_WORKERS < 1:
+    print(Fore.RED + f"Invalid GTEN_WHISPER_WORKERS={os.environ.get('GTEN_WHISPER_WORKERS')!r}; use a whole number >= 1.")
+    sys.exit(1)
+# Worker processes only help CPU inference; CUDA keeps the batched pipeline
+WHISPER_PARALLEL = WHISPER_WORKERS > 1 and whisper_device() == "cpu"
+WHISPER_SAMPLE_RATE = 16000
+_WHISPER_POOL = None
+_WORKER_MODEL = None
+_WORKER_CONFIG = None
+
+TranscriptSegment = namedtuple("TranscriptSegment", "start end text")
+
+def _init_whisper_worker(name, cpu_threads):
+    # Only record the settings here: if loading failed in the initializer the
+    # pool would keep respawning workers and imap() would never return.
+    global _WORKER_CONFIG
+    _WORKER_CONFIG = (name, cpu_threads)
+
+def _transcribe_chunk(job):
+    global _WORKER_MODEL
+    if _WORKER_MODEL is None:
+        # Loaded on first use, so a load error reaches the caller through imap()
+        name, cpu_threads = _WORKER_CONFIG
+        _WORKER_MODEL = WhisperModel(
+            name, device="cpu", compute_type=whisper_compute_type("cpu"), cpu_threads=cpu_threads,
+        )
+    offset, chunk = job
+    segments, _info = _WORKER_MODEL.transcribe(
+        chunk, language=PIPELINE_CONFIG["lang"], task=PIPELINE_CONFIG["task"], vad_filter=True,
+    )
+    return [TranscriptSegment(s.start + offset, s.end + offset, s.text) for s in segments]
+
+def get_whisper_pool(name="medium"):
+    """Return the shared pool of Whisper worker processes, starting it on first use."""
+    global _WHISPER_POOL
+    if _WHISPER_POOL is None:
+        threads = max(1, (os.cpu_count() or 1) // WHISPER_WORKERS)
+        print(Fore.YELLOW + f"🔄 Starting {WHISPER_WORKERS} Whisper workers x {threads} threads ({name}). This may take a while...")
+        # spawn, not fork: CTranslate2's thread pools do not survive a fork
+        ctx = multiprocessing.get_context("spawn")
+        _WHISPER_POOL = ctx.Pool(
+            WHISPER_WORKERS, initializer=_init_whisper_worker, initargs=(name, threads),
+        )
+    return _WHISPER_POOL
+
+def close_whisper_pool():
+    """Terminate the worker pool (e.g. after a failed run); it restarts on next use."""
+    global _WHISPER_POOL
+    if _WHISPER_POOL is not None:
+        _WHISPER_POOL.terminate()
+        _WHISPER_POOL.join()
+        _WHISPER_POOL = None
+
+def split_at_silence(audio, parts, sample_rate=WHISPER_SAMPLE_RATE, min_silence_ms=500, silence_thresh=-40.0):
+    """Cut mono float audio into about `parts` chunks, placing cuts inside silences.
+
+    Returns (offset_seconds, chunk) pairs covering the whole input.
+    """
+    win = sample_rate // 100  # 10 ms analysis windows
+    n_win = len(audio) // win
+    if parts <= 1 or n_win == 0:
+        return [(0.0, audio)]
+    frames = audio[:n_win * win].reshape(n_win, win)
+    silent = 20 * np.log10(np.sqrt(np.mean(frames ** 2, axis=1)) + 1e-10) < silence_thresh
+
+    # Centres of the silent runs that are long enough to cut in
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    run_starts, run_ends = edges[::2], edges[1::2]
+    long_runs = (run_ends - run_starts) * 10 >= min_silence_ms
+    centres = ((run_starts + run_ends) // 2)[long_runs] * win
+
+    cuts = []
+    for k in range(1, parts):
+        cut = k * len(audio) // parts
+        if len(centres):
+            cut = int(centres[np.argmin(np.abs(centres - cut))])
+        if 0 < cut < len(audio) and (not cuts or cut > cuts[-1]):
+            cuts.append(cut)
+    bounds = [0] + cuts + [len(audio)]
+    return [(a / sample_rate, audio[a:b]) for a, b in zip(bounds[:-1], bounds[1:])]
+
+def transcribe_parallel(input_mp3, name="medium"):
+    """Yield segments in time order, transcribing silence-split chunks in parallel."""
+    pool = get_whisper_pool(name)
+    audio = decode_audio(input_mp3, sampling_rate=WHISPER_SAMPLE_RATE)
+    chunks = split_at_silence(audio, WHISPER_WORKERS)
+    for chunk_segments in pool.imap(_transcribe_chunk, chunks):
+        yield from chunk_segments
+
+# ----------------------------
+# TTS helpers
+# ----------------------------
+TTS_WORKERS = 8
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "gten_translator")
+TTS_CACHE_DIR = os.path.join(CACHE_DIR, "tts")
+
+class _KeepAliveSession(requests.Session):
+    """Session that survives the ``with requests.Session()`` blocks inside gTTS."""
+    def __exit__(self, *args):
+        pass
+
+# One pooled HTTPS session for every gTTS call, so the TCP + TLS handshake is
+# paid once per worker connection rather than once per segment
+_TTS_SESSION = _KeepAliveSession()
+_TTS_SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=TTS_WORKERS, pool_maxsize=TTS_WORKERS,
+))
+
+def _share_gtts_session():
+    # gTTS opens a fresh Session (or calls requests.post) per request; hand it a
+    # copy of the requests module whose entry points use the shared session.
+    shim = types.ModuleType("requests")
+    shim.__dict__.update(vars(requests))
+    shim.Session = lambda: _TTS_SESSION
+    shim.get = _TTS_SESSION.get
+    shim.post = _TTS_SESSION.post
+    gtts.tts.requests = shim
+
+_share_gtts_session()
+
+def prewarm_tts_session():
+    """Open the gTTS connection early so the handshake overlaps model loading."""
+    # gTTS sends with verify=False, and urllib3 keys its pools on the certificate
+    # mode; match it so gTTS reuses this connection (and silence the same warning).
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    try:
+        _TTS_SESSION.head("https://translate.google.com/", timeout=5, verify=False)
+    except requests.RequestException:
+        pass
+
+def cached_tts(text, lang):
+    """Return gTTS MP3 bytes for (text, lang), reusing the on-disk cache."""
+    key = hashlib.sha256(f"{lang}\0{text}".encode("utf-8")).hexdigest()
+    cached = os.path.join(TTS_CACHE_DIR, key + ".mp3")
+    try:
+        with open(cached, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+
+    buf = io.BytesIO()
+    gTTS(text=text, lang=lang).write_to_fp(buf)
+    data = buf.getvalue()
+    # Write to a private file first so a concurrent reader never sees a
+    # truncated entry in the cache.
+    partial = f"{cached}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+        with open(partial, "wb") as f:
+            f.write(data)
+        os.replace(partial, cached)
+    except OSError as e:
+        print(Fore.RED + f"Could not cache TTS audio: {e}")
+    finally:
+        safe_remove(partial)
+    return data
+
+# Path to a Piper voice (.onnx, with its .onnx.json config next to it)
+PIPER_VOICE = os.environ.get("GTEN_PIPER_VOICE", "")
+if PIPER_VOICE:
+    # A local voice was asked for: never fall back to sending text to Google
+    if ort is None:
+        print(Fore.RED + f"GTEN_PIPER_VOICE is set but local TTS is unavailable: {_LOCAL_TTS_IMPORT_ERROR}")
+        print("Install required packages: pip install -U onnxruntime piper-phonemize scipy")
+        sys.exit(1)
+    for _path in (PIPER_VOICE, PIPER_VOICE + ".json"):
+        if not os.path.isfile(_path):
+            print(Fore.RED + f"Piper voice file not found: {_path}")
+            sys.exit(1)
+USE_PIPER = bool(PIPER_VOICE)
+_PIPER = None
+
+def piper_identity():
+    """Describe the configured voice for the output-cache manifest."""
+    with open(PIPER_VOICE + ".json", "rb") as f:
+        config_hash = hashlib.sha256(f.read()).hexdigest()
+    st = os.stat(PIPER_VOICE)
+    return {
+        "engine": "piper",
+        "voice": os.path.abspath(PIPER_VOICE),
+        "config_sha256": config_hash,
+        "model_size": st.st_size,
+        "model_mtime": st.st_mtime_ns,
+    }
+
+def get_piper():
+    """Return the shared (session, config) for the Piper voice, loading it on first use."""
+    global _PIPER
+    if _PIPER is None:
+        with open(PIPER_VOICE + ".json", "r", encoding="utf-8") as f:
+            config = json.load(f)
+        available = ort.get_available_providers()
+        providers = [p for p in ("CUDAExecutionProvider", "CPUExecutionProvider") if p in available]
+        _PIPER = (ort.InferenceSession(PIPER_VOICE, providers=providers), config)
+    return _PIPER
+
+def piper_synth(text):
+    """Synthesize text locally; returns (float32 mono PCM, sample rate)."""
+    session, config = get_piper()
+    id_map = config["phoneme_id_map"]
+    ids = list(id_map["^"])
+    for sentence in phonemize_espeak(text, config["espeak"]["voice"]):
+        for phoneme in sentence:
+            if phoneme in id_map:
+                ids.extend(id_map[phoneme])
+                ids.extend(id_map["_"])
+    ids.extend(id_map["$"])
+
+    inference = config.get("inference", {})
+    inputs = {
+        "input": np.array([ids], dtype=np.int64),
+        "input_lengths": np.array([len(ids)], dtype=np.int64),
+        "scales": np.array([
+            inference.get("noise_scale", 0.667),
+            inference.get("length_scale", 1.0),
+            inference.get("noise_w", 0.8),
+        ], dtype=np.float32),
+    }
+    if config.get("num_speakers", 1) > 1:
+        inputs["sid"] = np.array([0], dtype=np.int64)
+    audio = session.run(None, inputs)[0]
+    return audio.reshape(-1).astype(np.float32), config["audio"]["sample_rate"]
+
+def float_pcm_to_int16(audio, src_rate, sample_rate, channels):
+    """Resample float PCM to sample_rate and return int16 samples shaped (n, channels)."""
+    if src_rate != sample_rate:
+        g = math.gcd(src_rate, sample_rate)
+        audio = resample_poly(audio, sample_rate // g, src_rate // g)
+    audio = audio * (32767 / max(0.01, float(np.max(np.abs(audio), initial=0.0))))
+    audio = np.clip(audio, -32768, 32767).astype(np.int16)
+    return np.repeat(audio[:, None], channels, axis=1)
+
+def synthesize_segment(text, sample_rate, channels):
+    """Return speech for text as int16 samples shaped (n, channels) at sample_rate."""
+    if USE_PIPER:
+        audio, voice_rate = piper_synth(text)
+        return float_pcm_to_int16(audio, voice_rate, sample_rate, channels)
+    # gTTS audio stays in memory: no temp file and no ffmpeg subprocess
+    mp3 = cached_tts(text, "en")
+    return load_audio(io.BytesIO(mp3), sample_rate, channels)[0]
+
+def synthesize_job(job):
+    """Run TTS for one (index, text, rate, channels) job; returns (index, samples, error)."""
+    i, text, sample_rate, channels = job
+    try:
+        return i, synthesize_segment(text, sample_rate, channels), None
+    except Exception as e:
+        return i, None, e
+
+# ----------------------------
+# Output cache (skip work for unchanged inputs)
+# ----------------------------
+OUTPUT_CACHE_DIR = os.path.join(CACHE_DIR, "outputs")
+PIPELINE_CONFIG = {
+    "model": "medium",
+    "lang": "es",
+    "task": "translate",
+    "precision": WHISPER_PRECISION,
+    "tts": piper_identity() if USE_PIPER else "gTTS-en",
+}
+if WHISPER_PARALLEL:
+    # Silence-split chunks transcribe differently from the batched pipeline
+    PIPELINE_CONFIG["workers"] = WHISPER_WORKERS
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def restore_cached_outputs(key, output_mp3, output_srt):
+    """Copy cached outputs for key to the destinations; returns True on a hit."""
+    base = os.path.join(OUTPUT_CACHE_DIR, key)
+    try:
+        with open(base + ".json", "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if manifest != PIPELINE_CONFIG:
+        return False
+    if not (os.path.isfile(base + ".mp3") and os.path.isfile(base + ".srt")):
+        return False
+    shutil.copyfile(base + ".mp3", output_mp3)
+    shutil.copyfile(base + ".srt", output_srt)
+    return True
+
+def store_cached_srt(key, output_srt):
+    """Cache the subtitles; returns True if the audio may be cached afterwards."""
+    base = os.path.join(OUTPUT_CACHE_DIR, key)
+    try:
+        os.makedirs(OUTPUT_CACHE_DIR, exist_ok=True)
+        # Invalidate any previous entry until the matching audio is stored too
+        safe_remove(base + ".json")
+        shutil.copyfile(output_srt, base + ".srt")
+        return True
+    except OSError as e:
+        print(Fore.RED + f"Could not cache outputs: {e}")
+        return False
+
+def store_cached_outputs(key, output_mp3):
+    """Cache the audio and complete the entry started by store_cached_srt()."""
+    base = os.path.join(OUTPUT_CACHE_DIR, key)
+    try:
+        shutil.copyfile(output_mp3, base + ".mp3")
+        # Manifest goes last so a half-written entry is never treated as a hit
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(PIPELINE_CONFIG, f)
+    except OSError as e:
+        print(Fore.RED + f"Could not cache outputs: {e}")
+
+# ----------------------------
+# Background export
+# ----------------------------
+# MP3 encoding runs here so the next file can start while the last one encodes
+EXPORT_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="gten-export")
+_PENDING_EXPORTS = []
+
+def export_mp3(mix, sample_rate, channels, output_mp3):
+    """Encode the mix buffer to MP3 in-process with PyAV (libmp3lame)."""
+    layout = "stereo" if channels == 2 else "mono"
+    with av.open(output_mp3, mode="w") as container:
+        stream = container.add_stream("mp3", rate=sample_rate)
+        stream.layout = layout
+        # Packed s16 wants one interleaved row; the encoder re-frames it to its frame size
+        frame = av.AudioFrame.from_ndarray(mix.reshape(1, -1), format="s16", layout=layout)
+        frame.rate = sample_rate
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+def finish_outputs(mix, sample_rate, channels, output_mp3, output_srt, cache_key):
+    """Encode the mixed audio, then cache (unless cache_key is None) and report it."""
+    export_mp3(mix, sample_rate, channels, output_mp3)
+    if cache_key is not None:
+        store_cached_outputs(cache_key, output_mp3)
+    print(Fore.GREEN + f"\n✅ Done! Saved audio: {output_mp3}")
+    print(Fore.GREEN + f"✅ Subtitles: {output_srt}")
+
+def wait_for_exports():
+    """Block until all background exports finish, reporting any failures."""
+    wait(_PENDING_EXPORTS)
+    for future in _PENDING_EXPORTS:
+        if future.exception() is not None:
+            print(Fore.RED + f"Audio export failed: {future.exception()}")
+    _PENDING_EXPORTS.clear()
 
 # ----------------------------
 # Core translation function
 # ----------------------------
 def spanish_to_english_aligned_with_subs():
-    check_ffmpeg()
-
     input_mp3 = input("🎵 Enter the path to your Spanish MP3 file: ").strip().strip('"').strip("'")
     if not input_mp3:
         print(Fore.RED + "No input path provided. Exiting.")
@@ -123,94 +594,203 @@ def spanish_to_english_aligned_with_subs():
         print(Fore.RED + f"File not found: {input_mp3}")
         return
 
-    output_mp3 = "english_aligned_output.mp3"
-    output_srt = "english_subtitles.srt"
-
-    print(Fore.YELLOW + "🔄 Loading Whisper model (medium). This may take a while...")
-    model = whisper.load_model("medium")
-
-    try:
-        print(Fore.YELLOW + "🎙️ Transcribing + translating (Whisper) ...")
-        result = model.transcribe(input_mp3, language="es", task="translate", verbose=False)
-    except Exception as e:
-        print(Fore.RED + "Whisper transcription failed: " + str(e))
+    translate(input_mp3)
+
+def translate_batch(paths):
+    """Translate several files; each one's export overlaps the next one's work."""
+    seen_inputs = set()
+    used_stems = set()
+    for input_mp3 in paths:
+        if not os.path.isfile(input_mp3):
+            print(Fore.RED + f"File not found: {input_mp3}")
+            continue
+        real_path = os.path.realpath(input_mp3)
+        if real_path in seen_inputs:
+            print(Fore.RED + f"Skipping duplicate input: {input_mp3}")
+            continue
+        seen_inputs.add(real_path)
+
+        # Earlier exports may still be writing, so every file needs its own outputs
+        base_stem = os.path.splitext(os.path.basename(input_mp3))[0]
+        stem, k = base_stem, 1
+        while stem in used_stems:
+            k += 1
+            stem = f"{base_stem}_{k}"
+        used_stems.add(stem)
+
+        print(Fore.MAGENTA + Style.BRIGHT + f"\n=== {input_mp3} ===")
+        translate(input_mp3, f"{stem}_english_aligned.mp3", f"{stem}_english.srt")
+
+def translate(input_mp3, output_mp3="english_aligned_output.mp3", output_srt="english_subtitles.srt"):
+    """Translate one Spanish audio file into aligned English audio + SRT.
+
+    The Whisper model is cached at module level, so repeated calls in the same
+    process only pay the model load once. The MP3 export runs in the background;
+    call wait_for_exports() before exiting.
+    """
+    cache_key = file_sha256(input_mp3)
+    if restore_cached_outputs(cache_key, output_mp3, output_srt):
+        print(Fore.GREEN + "⚡ Input unchanged since a previous run; reusing cached results.")
+        print(Fore.GREEN + f"\n✅ Done! Saved audio: {output_mp3}")
+        print(Fore.GREEN + f"✅ Subtitles: {output_srt}")
         return
 
     try:
-        original_audio = AudioSegment.from_file(input_mp3)
+        original_pcm, sample_rate = load_audio(input_mp3)
     except Exception as e:
         print(Fore.RED + "Failed to load input audio: " + str(e))
         return
 
-    # Create silent track same length as original
-    final_audio = AudioSegment.silent(duration=len(original_audio))
-
-    srt_lines = []
-    temp_dir = tempfile.mkdtemp(prefix="gten_tts_")
-    created_temp_files = []
-
-    print(Fore.GREEN + f"Transcription produced {len(result.get('segments', []))} segments (approx).")
+    # Mix into one preallocated int16 buffer, saturating as clips are added,
+    # instead of repeated overlay() calls that copy the whole track each time.
+    channels = original_pcm.shape[1]
+    mix = np.zeros((original_pcm.shape[0], channels), dtype=np.int16)
+    del original_pcm
+
+    # Pipeline: Whisper yields segments -> TTS pool synthesizes them -> the
+    # mixer thread consumes finished clips in segment order. Transcription,
+    # gTTS round-trips and mixing all overlap instead of running back to back.
+    done_q = queue.Queue()
+    mixer_errors = []
+    srt_fp = None
+    seg_index = 0
+    failed_segments = 0
+
+    def tts_task(n, i, seg):
+        job = (i, seg.text.strip(), sample_rate, channels)
+        _, arr, err = synthesize_job(job)
+        done_q.put((n, i, seg, arr, err))
+
+    def mix_segment(i, seg, arr, err):
+        """Mix one clip; returns its (start_ms, end_ms, text) SRT entry, or None."""
+        nonlocal failed_segments
+        start_ms = int(seg.start * 1000)
+        end_ms = int(seg.end * 1000)
+        english_text = seg.text.strip()
+
+        if err is not None:
+            print(Fore.RED + f"TTS failed for segment {i}: {err}. Skipping.")
+            failed_segments += 1
+            return None
+
+        # Align segment duration: trimming is a view, and short clips need no
+        # padding because the mix buffer is already silent past their end.
+        start_sample = start_ms * sample_rate // 1000
+        target = max(1, end_ms - start_ms) * sample_rate // 1000
+        arr = arr[:min(target, max(0, len(mix) - start_sample))]
+
+        # Add into the mix buffer at the correct position
+        mix_saturating(mix, arr, start_sample)
+        return start_ms, end_ms, english_text
+
+    def write_srt(entries):
+        nonlocal seg_index
+        count = len(entries)
+        # Format every timestamp in the run with one vectorized divmod chain
+        starts = ms_to_srt_timestamps(np.fromiter((e[0] for e in entries), dtype=np.int64, count=count))
+        ends = ms_to_srt_timestamps(np.fromiter((e[1] for e in entries), dtype=np.int64, count=count))
+        srt_fp.write("".join(
+            f"{seg_index + k}\n{a} --> {b}\n{text}\n\n"
+            for k, (a, b, (_, _, text)) in enumerate(zip(starts, ends, entries), start=1)
+        ))
+        seg_index += count
+
+    def mixer():
+        # TTS jobs finish out of order; a min-heap on the job number releases
+        # them in segment order so SRT numbering stays sequential.
+        pending = []
+        next_n = 0
+        try:
+            while True:
+                item = done_q.get()
+                if item is None:
+                    break
+                heapq.heappush(pending, item)
+                ready = []
+                while pending and pending[0][0] == next_n:
+                    _, i, seg, arr, err = heapq.heappop(pending)
+                    entry = mix_segment(i, seg, arr, err)
+                    if entry is not None:
+                        ready.append(entry)
+                    next_n += 1
+                # Each released run of in-order segments goes to the SRT in one write
+                if ready:
+                    write_srt(ready)
+        except Exception as e:
+            mixer_errors.append(e)
 
     try:
-        for i, seg in enumerate(result.get("segments", [])):
-            start_ms = int(seg.get("start", 0) * 1000)
-            end_ms = int(seg.get("end", 0) * 1000)
-            english_text = seg.get("text", "").strip()
-            if not english_text:
-                continue
-
-            print(Fore.CYAN + f"[Segment {i+1}] {seg.get('start'):.2f}s - {seg.get('end'):.2f}s -> {english_text}")
+        if not USE_PIPER:
+            threading.Thread(target=prewarm_tts_session, name="gten-prewarm", daemon=True).start()
+        parallel = WHISPER_PARALLEL
+        if not parallel:
+            pipe = get_whisper(PIPELINE_CONFIG["model"])
+        if USE_PIPER:
+            get_piper()
+        print(Fore.YELLOW + f"🗣️ Speech backend: {PIPELINE_CONFIG['tts']}")
 
-            # Generate TTS with gTTS
-            segment_file = os.path.join(temp_dir, f"segment_{i}.mp3")
-            try:
-                tts = gTTS(text=english_text, lang="en")
-                tts.save(segment_file)
-                created_temp_files.append(segment_file)
-            except Exception as e:
-                print(Fore.RED + f"gTTS failed for segment {i}: {e}. Skipping.")
-                continue
+        print(Fore.YELLOW + f"Writing subtitles to: {output_srt}")
+        srt_fp = open(output_srt, "w", encoding="utf-8")
+        mixer_thread = threading.Thread(target=mixer, name="gten-mixer", daemon=True)
+        mixer_thread.start()
 
+        transcription_failed = False
+        n = 0
+        with ThreadPoolExecutor(max_workers=TTS_WORKERS) as ex:
             try:
-                seg_audio = AudioSegment.from_file(segment_file)
+                print(Fore.YELLOW + "🎙️ Transcribing + translating (Whisper) ...")
+                if parallel:
+                    segments = transcribe_parallel(input_mp3, PIPELINE_CONFIG["model"])
+                else:
+                    # VAD splits the input into speech regions that are decoded in batches
+                    segments, _info = pipe.transcribe(
+                        input_mp3, language=PIPELINE_CONFIG["lang"], task=PIPELINE_CONFIG["task"],
+                        batch_size=WHISPER_BATCH_SIZE, vad_filter=True,
+                    )
+                for i, seg in enumerate(segments):
+                    english_text = seg.text.strip()
+                    if not english_text:
+                        continue
+                    print(Fore.CYAN + f"[Segment {i+1}] {seg.start:.2f}s - {seg.end:.2f}s -> {english_text}")
+                    ex.submit(tts_task, n, i, seg)
+                    n += 1
             except Exception as e:
-                print(Fore.RED + f"Failed to load generated TTS segment {segment_file}: {e}")
-                continue
-
-            # Align segment duration
-            target_duration = max(1, end_ms - start_ms)
-            if len(seg_audio) > target_duration:
-                seg_audio = seg_audio[:target_duration]
-            elif len(seg_audio) < target_duration:
-                seg_audio += AudioSegment.silent(duration=(target_duration - len(seg_audio)))
-
-            # Overlay onto final_audio at correct position
-            final_audio = final_audio.overlay(seg_audio, position=start_ms)
-
-            # Add SRT entry
-            start_srt = ms_to_srt_timestamp(start_ms)
-            end_srt = ms_to_srt_timestamp(end_ms)
-            srt_lines.append(f"{len(srt_lines)+1}\n{start_srt} --> {end_srt}\n{english_text}\n")
+                print(Fore.RED + "Whisper transcription failed: " + str(e))
+                transcription_failed = True
+                if parallel:
+                    close_whisper_pool()
+
+        # All TTS jobs have reported back once the executor has shut down
+        done_q.put(None)
+        mixer_thread.join()
+        srt_fp.close()
+        if mixer_errors:
+            raise mixer_errors[0]
+        if transcription_failed:
+            safe_remove(output_srt)
+            return
+
+        print(Fore.GREEN + f"Transcription produced {n} segments with speech.")
+
+        # Outputs missing segments must not be served as a cache hit on later
+        # runs. The SRT is cached now, before anything can overwrite it; the
+        # export thread completes the entry once the MP3 is written.
+        if failed_segments:
+            print(Fore.RED + f"{failed_segments} segment(s) failed TTS; results will not be cached.")
+            cache_key = None
+        elif not store_cached_srt(cache_key, output_srt):
+            cache_key = None
 
         # Export results
         print(Fore.YELLOW + f"Exporting final aligned English audio to: {output_mp3}")
-        final_audio.export(output_mp3, format="mp3")
-
-        print(Fore.YELLOW + f"Writing subtitles to: {output_srt}")
-        with open(output_srt, "w", encoding="utf-8") as f:
-            f.write("\n".join(srt_lines))
-
-        print(Fore.GREEN + f"\n✅ Done! Saved audio: {output_mp3}")
-        print(Fore.GREEN + f"✅ Subtitles: {output_srt}")
+        _PENDING_EXPORTS.append(EXPORT_EXECUTOR.submit(
+            finish_outputs, mix, sample_rate, channels, output_mp3, output_srt, cache_key,
+        ))
 
     finally:
         # Cleanup
-        for p in created_temp_files:
-            safe_remove(p)
-        try:
-            shutil.rmtree(temp_dir)
-        except Exception:
-            pass
+        if srt_fp is not None:
+            srt_fp.close()
 
 # ----------------------------
 # Main entry
@@ -226,7 +806,12 @@ def main():
         print(Fore.RED + "Authorization not provided. Exiting.")
         sys.exit(1)
 
-    spanish_to_english_aligned_with_subs()
+    # Input files on the command line run as a batch; otherwise prompt for one
+    if len(sys.argv) > 1:
+        translate_batch(sys.argv[1:])
+    else:
+        spanish_to_english_aligned_with_subs()
+    wait_for_exports()
 
 if __name__ == "__main__":
     main()